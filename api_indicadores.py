@@ -0,0 +1,245 @@
+"""API JSON local com os indicadores já calculados.
+
+Serve os agregados mensais, os totais do quadrimestre e as notas por
+CNES/UF/período para outros sistemas (BI, relatórios) sem abrir o Streamlit.
+Cada mês é gravado em disco na primeira consulta; daí em diante a resposta
+sai do arquivo, com ETag/Last-Modified, sem refazer o processamento. Mês sem
+arquivo no DATASUS ou com falha no download (`sem_dados`) é guardado à parte
+por TTL_PARCIAL segundos (Cache-Control: max-age) e recalculado depois disso,
+para que quem consulta em loop não refaça o download a cada chamada. O
+quadrimestre é montado na hora a partir dos meses em cache, então acompanha
+qualquer mês recalculado.
+
+Uso:
+    python api_indicadores.py --porta 8502
+
+    GET /mes?cnes=2142376&uf=MG&ano=2025&mes=5
+    GET /quadrimestre?cnes=2142376&uf=MG&ano=2025&q=Q2[&casos=..&cvc=..]
+
+`casos` e `cvc` (Indicador 8, manual) são listas separadas por vírgula, uma
+posição por mês do quadrimestre; sem elas valem zero, como na página.
+Para forçar o recálculo de um mês, apague o arquivo dele em DIR_CACHE.
+INDICADORES_TTL_PARCIAL muda a validade dos meses com sem_dados (padrão 15 min).
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from indicadores import get_meses_quadrimestre, processar_mes_unico, calcular_indicadores
+
+
+DIR_CACHE = os.environ.get("INDICADORES_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_indicadores"))
+
+QUADRIMESTRES = ["Q1 (Jan-Abr)", "Q2 (Mai-Ago)", "Q3 (Set-Dez)"]
+
+# Validade (s) de um mês com sem_dados antes de tentar de novo
+TTL_PARCIAL = int(os.environ.get("INDICADORES_TTL_PARCIAL", 15 * 60))
+
+UFS = ["AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA", "PB",
+       "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO"]
+
+# Um lock por resultado: consultas simultâneas ao mesmo período calculam uma vez só
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+# ===================== CACHE EM DISCO =====================
+
+def _json_default(o):
+    return o.item() if hasattr(o, "item") else str(o)
+
+
+def _caminho(tipo, params):
+    nome = "_".join(f"{k}-{params[k]}" for k in sorted(params))
+    raiz = os.path.realpath(DIR_CACHE)
+    caminho = os.path.realpath(os.path.join(raiz, tipo, f"{nome}.json"))
+    if os.path.commonpath([raiz, caminho]) != raiz: raise ValueError("parâmetros inválidos")
+    return caminho
+
+
+def _lock(caminho):
+    with _locks_guard:
+        return _locks.setdefault(caminho, threading.Lock())
+
+
+def _etag(corpo):
+    return '"' + hashlib.sha1(corpo).hexdigest() + '"'
+
+
+def _corpo(resultado):
+    return json.dumps(resultado, default=_json_default, ensure_ascii=False).encode("utf-8")
+
+
+def _gravar(caminho, corpo):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = caminho + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(corpo)
+    os.replace(tmp, caminho)
+
+
+def _restante(caminho):
+    """Segundos até o arquivo parcial vencer (0 se não existe ou já venceu)."""
+    try:
+        return max(0, int(TTL_PARCIAL - (time.time() - os.path.getmtime(caminho))))
+    except OSError:
+        return 0
+
+
+def obter(tipo, params, calcular, final=lambda r: True):
+    """Devolve (corpo, etag, mtime, max_age) do resultado, calculando só se preciso.
+
+    Resultado final fica no disco até ser apagado (max_age None). Resultado
+    para o qual `final` devolve False vai para um arquivo .parcial.json que
+    vale TTL_PARCIAL segundos; max_age é o tempo que ainda falta.
+    """
+    caminho = _caminho(tipo, params)
+    parcial = caminho[:-len(".json")] + ".parcial.json"
+    with _lock(caminho):
+        if not os.path.exists(caminho) and not _restante(parcial):
+            resultado = calcular()
+            if final(resultado):
+                _gravar(caminho, _corpo(resultado))
+                if os.path.exists(parcial): os.remove(parcial)
+            else:
+                _gravar(parcial, _corpo(resultado))
+        arquivo, max_age = (caminho, None) if os.path.exists(caminho) else (parcial, _restante(parcial))
+        with open(arquivo, "rb") as f:
+            corpo = f.read()
+        return corpo, _etag(corpo), os.path.getmtime(arquivo), max_age
+
+
+# ===================== RESULTADOS =====================
+
+def _calcular_mes(cnes, uf, ano, mes):
+    return {k: v for k, v in processar_mes_unico(ano, mes, uf, cnes).items() if k != "logs"}
+
+
+def obter_mes(cnes, uf, ano, mes):
+    return obter("mes", {"cnes": cnes, "uf": uf, "ano": ano, "mes": mes},
+                 lambda: _calcular_mes(cnes, uf, ano, mes), final=lambda r: not r["sem_dados"])
+
+
+def obter_quadrimestre(cnes, uf, ano, q, casos, cvc):
+    """Monta o quadrimestre a partir dos meses em cache (não tem arquivo próprio).
+
+    O ETag vem do corpo, então muda junto com qualquer mês recalculado; com
+    mês parcial, o max_age é o do mês que vence primeiro.
+    """
+    meses = get_meses_quadrimestre(q)
+    obtidos = [obter_mes(cnes, uf, ano, m) for m in meses]
+    res = [json.loads(corpo) for corpo, _, _, _ in obtidos]
+    manual = [(ano, m, casos[i] if i < len(casos) else 0, cvc[i] if i < len(cvc) else 0) for i, m in enumerate(meses)]
+    df, t = calcular_indicadores(res, manual)
+    corpo = _corpo({"cnes": cnes, "uf": uf, "ano": ano, "quadrimestre": q,
+                    "meses": json.loads(df.drop(columns=["sem_dados"], errors="ignore").to_json(orient="records")),
+                    "sem_dados": {f"{r['mes']:02d}": r["sem_dados"] for r in res if r.get("sem_dados")},
+                    "totais": t})
+    parciais = [max_age for _, _, _, max_age in obtidos if max_age is not None]
+    return corpo, _etag(corpo), max(mtime for _, _, mtime, _ in obtidos), min(parciais, default=None)
+
+
+# ===================== HTTP =====================
+
+def _int(qs, nome, padrao=None):
+    valor = qs.get(nome, [padrao])[0]
+    if valor is None: raise ValueError(f"parâmetro obrigatório: {nome}")
+    return int(valor)
+
+
+def _lista_int(qs, nome, tamanho):
+    valor = qs.get(nome, [""])[0]
+    lista = [int(v) for v in valor.split(",") if v.strip()]
+    if len(lista) > tamanho: raise ValueError(f"{nome}: no máximo {tamanho} valores, um por mês")
+    return lista
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        qs = parse_qs(url.query)
+        try:
+            cnes = str(_int(qs, "cnes"))
+            uf = qs.get("uf", ["MG"])[0].upper()
+            if uf not in UFS: raise ValueError("uf inválida")
+            ano = _int(qs, "ano")
+
+            if url.path == "/mes":
+                mes = _int(qs, "mes")
+                if not 1 <= mes <= 12: raise ValueError("mes deve estar entre 1 e 12")
+                corpo, etag, mtime, max_age = obter_mes(cnes, uf, ano, mes)
+
+            elif url.path == "/quadrimestre":
+                q_arg = qs.get("q", [""])[0].upper()
+                q = next((l for l in QUADRIMESTRES if l[:2] == q_arg), None)
+                if not q: raise ValueError("q deve ser Q1, Q2 ou Q3")
+                n = len(get_meses_quadrimestre(q))
+                casos, cvc = _lista_int(qs, "casos", n), _lista_int(qs, "cvc", n)
+                corpo, etag, mtime, max_age = obter_quadrimestre(cnes, uf, ano, q, casos, cvc)
+
+            else:
+                return self._erro(404, "rota desconhecida (use /mes ou /quadrimestre)")
+
+        except ValueError as e:
+            return self._erro(400, str(e))
+        except Exception as e:
+            return self._erro(500, f"falha ao calcular: {e}")
+
+        self._responder(corpo, etag, mtime, max_age)
+
+    def _nao_modificado(self, etag, mtime):
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            return inm.strip() == "*" or etag in [t.strip() for t in inm.split(",")]
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _responder(self, corpo, etag, mtime, max_age=None):
+        nao_mod = self._nao_modificado(etag, mtime)
+        self.send_response(304 if nao_mod else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        # Final: sempre revalidar (304 barato); parcial: só até o recálculo
+        self.send_header("Cache-Control", "no-cache" if max_age is None else f"max-age={max_age}")
+        if nao_mod:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _erro(self, status, msg):
+        corpo = json.dumps({"erro": msg}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API JSON local dos indicadores")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8502)
+    args = parser.parse_args()
+
+    servidor = ThreadingHTTPServer((args.host, args.porta), Handler)
+    print(f"API de indicadores em http://{args.host}:{args.porta} (cache: {DIR_CACHE})")
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark de partida a frio do app (tempo até a primeira renderização).
+
+Cada rodada sobe um interpretador novo, como um worker/container recém-criado,
+e mede quanto tempo leva para importar o Streamlit e renderizar a página
+inicial (sidebar + título, sem clicar em nada) com o AppTest do Streamlit.
+Também lista quais módulos pesados já foram carregados nesse ponto: com os
+imports preguiçosos, pysus e matplotlib não devem aparecer (pandas/numpy
+dependem da versão do Streamlit, que pode carregá-los por conta própria).
+
+Uso:
+    python bench_startup.py [--rodadas 5] [--saida bench.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+PESADOS = ["pysus", "matplotlib", "pandas", "numpy", "duckdb"]
+
+CODIGO = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+t2 = time.perf_counter()
+print(json.dumps({{
+    "import_streamlit": t1 - t0,
+    "primeira_renderizacao": t2 - t0,
+    "erros": [str(e.value) for e in at.exception],
+    "carregados": [m for m in {pesados!r} if m in sys.modules],
+}}))
+"""
+
+
+def rodada():
+    codigo = CODIGO.format(app=APP, pesados=PESADOS)
+    out = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                         cwd=os.path.dirname(APP))
+    if out.returncode != 0:
+        sys.stderr.write(out.stderr)
+        print(f"rodada falhou (código {out.returncode})", file=sys.stderr)
+        sys.exit(out.returncode)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de partida a frio do streamlit_app.py")
+    parser.add_argument("--rodadas", type=int, default=5)
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    rodadas = [rodada() for _ in range(args.rodadas)]
+    tempos = [r["primeira_renderizacao"] for r in rodadas]
+    resultado = {
+        "python": sys.version.split()[0],
+        "rodadas": args.rodadas,
+        "primeira_renderizacao_mediana": statistics.median(tempos),
+        "primeira_renderizacao_min": min(tempos),
+        "import_streamlit_mediana": statistics.median(r["import_streamlit"] for r in rodadas),
+        # União de todas as rodadas: um import que só acontece às vezes também aparece
+        "carregados": sorted({m for r in rodadas for m in r["carregados"]}),
+        "erros": sorted({e for r in rodadas for e in r["erros"]}),
+    }
+
+    print(f"Primeira renderização: mediana {resultado['primeira_renderizacao_mediana']:.3f}s, "
+          f"mínimo {resultado['primeira_renderizacao_min']:.3f}s ({args.rodadas} rodadas)")
+    print(f"  import do streamlit: {resultado['import_streamlit_mediana']:.3f}s")
+    print(f"  módulos pesados carregados: {', '.join(resultado['carregados']) or 'nenhum'}")
+    if resultado["erros"]: print(f"  erros na renderização: {resultado['erros']}")
+
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(resultado, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
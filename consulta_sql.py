@@ -0,0 +1,187 @@
+"""Backend SQL colunar (DuckDB) para as agregações de RD/SP.
+
+Roda as mesmas contas de `processar_mes_unico` direto sobre os Parquet que o
+pysus guarda em cache, sem carregar o mês inteiro no pandas: o DuckDB lê só as
+colunas usadas (projection pushdown), filtra o CNES na leitura e usa todos os
+núcleos. O DuckDB é opcional; sem ele o app segue no caminho pandas.
+"""
+from functools import lru_cache
+from importlib.util import find_spec
+
+import esquemas
+
+
+# Mesmas regras do caminho pandas (ver indicadores.py)
+UTI_ADULTO = '0802010083'
+UTI_NEO = '0802010121'
+UTI_PED = '0802010156'
+
+
+@lru_cache(maxsize=None)
+def disponivel():
+    # Backend opcional; só verifica se está instalado, o import fica para conectar()
+    return find_spec("duckdb") is not None
+
+
+class ErroSQL(Exception):
+    """Falha do DuckDB (tipos conflitantes, arquivo ilegível...); quem chama refaz no pandas."""
+
+
+def conectar():
+    import duckdb
+    return duckdb.connect(database=":memory:")
+
+
+def _executar(con, sql, params=None):
+    import duckdb
+    try:
+        return con.execute(sql, params or [])
+    except duckdb.Error as e:
+        raise ErroSQL(str(e)) from e
+
+
+# ===================== SQL AUXILIAR =====================
+
+def _literal(texto):
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+def _id(coluna):
+    return '"' + coluna.replace('"', '""') + '"'
+
+
+def _fonte(caminhos):
+    lista = ", ".join(_literal(c) for c in caminhos)
+    return f"read_parquet([{lista}], union_by_name = true)"
+
+
+def _num(coluna, padrao=0):
+    # Equivalente a pd.to_numeric(errors='coerce').fillna(padrao); o TRY_CAST aceita 'nan' e
+    # devolve NaN (que o DuckDB ordena acima de tudo), o pandas trata como vazio
+    return f"COALESCE(NULLIF(TRY_CAST(TRIM(CAST({_id(coluna)} AS VARCHAR)) AS DOUBLE), 'NaN'::DOUBLE), {padrao})"
+
+
+def _cast(coluna, dtype):
+    """Conversão de `esquemas.DTYPES` em SQL, a mesma que `esquemas.normalizar` faz no pandas.
+
+    Coluna ausente vira o valor de preenchimento do registro.
+    """
+    tipo, padrao = dtype
+    if coluna is None: return "NULL" if tipo == "str" else str(padrao)
+    if tipo == "str": return f"TRIM(CAST({_id(coluna)} AS VARCHAR))"
+    if tipo == "int": return f"CAST(TRUNC({_num(coluna, padrao)}) AS BIGINT)"  # .astype(int) trunca, o CAST arredonda
+    return _num(coluna, padrao)
+
+
+def expressao(esquema, canon):
+    """SQL da coluna canônica `canon` de um `esquemas.resolver`, já no dtype do registro."""
+    return _cast(esquema["colunas"][canon], esquema["dtypes"][canon])
+
+
+def _lista(valores):
+    return ", ".join(_literal(v) for v in valores)
+
+
+def colunas(con, caminhos):
+    """{coluna: tipo físico} do Parquet, sem ler os dados."""
+    return {r[0]: r[1] for r in _executar(con, f"DESCRIBE SELECT * FROM {_fonte(caminhos)}").fetchall()}
+
+
+def _filtro_cnes(coluna, tipo, cnes):
+    """Filtro do CNES sobre a coluna crua, para o DuckDB usar as estatísticas do Parquet.
+
+    Vai junto (AND) com a comparação normalizada, então só pode descartar linhas
+    que a normalização também descartaria. Por isso só em coluna numérica: em
+    texto, " 2142376" ou "2142376.0" passam no pandas e não há filtro cru exato.
+    """
+    if tipo in ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT"):
+        return f"{_id(coluna)} = {cnes}"
+    if tipo in ("FLOAT", "DOUBLE") or tipo.startswith("DECIMAL"):
+        return f"{_id(coluna)} >= {cnes} AND {_id(coluna)} < {cnes + 1}"
+    return "TRUE"
+
+
+# ===================== AGREGAÇÕES =====================
+
+def agregar_rd(parquets, cnes_filter, codigos_espec, motivos_nao_contar, con=None):
+    """Saídas, óbitos e dias (geral/médica/cirúrgica) do RD de um CNES.
+
+    Layout sem coluna obrigatória levanta esquemas.LayoutDesconhecido, como no pandas.
+    """
+    con = con or conectar()
+    caminhos = esquemas.arquivos_parquet(parquets)
+    tipos = colunas(con, caminhos)
+    esquema = esquemas.resolver("RD", tipos)
+    col = lambda canon: expressao(esquema, canon)
+    cnes_c = esquema["colunas"]["CNES"]
+
+    e = f"TRIM(SPLIT_PART({col('ESPEC')}, '.', 1))"
+    espec = f"CASE WHEN LENGTH({e}) < 2 THEN LPAD({e}, 2, '0') ELSE {e} END"
+    med, cir = _lista(codigos_espec['MEDICA']), _lista(codigos_espec['CIRURGICA'])
+    motivos = ", ".join(str(int(m)) for m in motivos_nao_contar)
+
+    sql = f"""
+        WITH rd AS (
+            SELECT {col('DIAS_PERM')} AS dias,
+                   {col('MORTE')} AS morte,
+                   {espec} AS espec,
+                   {col('MOTIVO')} AS motivo
+            FROM {_fonte(caminhos)}
+            WHERE {_filtro_cnes(cnes_c, tipos[cnes_c], int(cnes_filter))}
+              AND {col('CNES')} = ?
+        )
+        SELECT COUNT(*),
+               COUNT(*) FILTER (WHERE morte = 1),
+               COALESCE(SUM(dias), 0),
+               COALESCE(SUM(dias) FILTER (WHERE espec IN ({med})), 0),
+               COUNT(*) FILTER (WHERE espec IN ({med}) AND motivo NOT IN ({motivos})),
+               COALESCE(SUM(dias) FILTER (WHERE espec IN ({cir})), 0),
+               COUNT(*) FILTER (WHERE espec IN ({cir}) AND motivo NOT IN ({motivos}))
+        FROM rd
+        WHERE dias >= 0
+    """
+    r = _executar(con, sql, [int(cnes_filter)]).fetchone()
+    return dict(zip(["saidas_tot", "obitos_tot", "dias_geral", "dias_med", "saidas_med", "dias_cir", "saidas_cir"], r))
+
+
+def agregar_sp(parquets, cnes_filter, con=None):
+    """Diárias de UTI (adulto/neo/ped) do SP de um CNES."""
+    con = con or conectar()
+    caminhos = esquemas.arquivos_parquet(parquets)
+    tipos = colunas(con, caminhos)
+    esquema = esquemas.resolver("SP", tipos)
+    col = lambda canon: expressao(esquema, canon)
+    cnes_s, c_aih = esquema["colunas"]["CNES"], esquema["colunas"]["NAIH"]
+
+    sql = f"""
+        WITH sp AS (
+            SELECT REGEXP_REPLACE({col('ATOPROF')}, '[^0-9]', '', 'g') AS ato,
+                   {col('QTD_ATO')} AS qtd,
+                   {col('IDADE')} AS idade
+            FROM {_fonte(caminhos)}
+            WHERE {_filtro_cnes(cnes_s, tipos[cnes_s], int(cnes_filter))}
+              AND {col('CNES')} = ?
+              AND {col('VALATO')} > 0
+              AND {_id(c_aih)} IS NOT NULL
+        )
+        SELECT COALESCE(SUM(qtd) FILTER (WHERE ato = '{UTI_ADULTO}' AND (idade >= 14 OR idade = -1)), 0),
+               COALESCE(SUM(qtd) FILTER (WHERE ato = '{UTI_NEO}' AND (idade < 1 OR idade = -1)), 0),
+               COALESCE(SUM(qtd) FILTER (WHERE ato = '{UTI_PED}'), 0)
+        FROM sp
+    """
+    return dict(zip(["dias_a", "dias_n", "dias_p"], _executar(con, sql, [int(cnes_filter)]).fetchone()))
+
+
+# ===================== CONSULTAS AD-HOC =====================
+
+def consultar(sql, params=None, con=None, **fontes):
+    """Roda SQL livre com cada fonte registrada como view.
+
+    Ex.: consultar("SELECT MES_CMPT, COUNT(*) FROM rd GROUP BY 1", rd=caminhos)
+    Cada fonte pode juntar vários meses/hospitais: basta passar todos os caminhos.
+    Para não depender do nome físico, monte as colunas com `expressao` (ver test_tmp.py).
+    """
+    con = con or conectar()
+    for nome, caminhos in fontes.items():
+        _executar(con, f"CREATE OR REPLACE VIEW {_id(nome)} AS SELECT * FROM {_fonte(esquemas.arquivos_parquet(caminhos))}")
+    return _executar(con, sql, params).df()
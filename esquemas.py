@@ -0,0 +1,122 @@
+"""Registro dos layouts de RD/SP do SIH/DATASUS.
+
+Cada arquivo é resolvido uma vez só pela sua assinatura (a lista de colunas):
+o resultado diz qual coluna física corresponde a cada nome canônico e para
+qual dtype ela vai. Substitui a busca por substring ("VAL", "QT_"), que no SP
+casa com mais de uma coluna (ex.: "QT_" pega SP_QT_PROC antes de SP_QTD_ATO).
+"""
+import glob
+import os
+from functools import lru_cache
+
+
+# Layouts conhecidos: versão -> {nome canônico: coluna física}
+LAYOUTS = {
+    "RD": {
+        "RD_2008": {"CNES": "CNES", "MORTE": "MORTE", "DIAS_PERM": "DIAS_PERM", "ESPEC": "ESPEC", "MOTIVO": "COBRANCA"},
+    },
+    "SP": {
+        "SP_2008": {"CNES": "SP_CNES", "ATOPROF": "SP_ATOPROF", "QTD_ATO": "SP_QTD_ATO", "VALATO": "SP_VALATO", "NAIH": "SP_NAIH"},
+    },
+}
+
+# Layout desconhecido (ou coluna opcional): nomes aceitos, só match exato, em ordem de preferência
+SINONIMOS = {
+    "RD": {
+        "CNES": ["CNES", "CNES_EXEC"],
+        "MORTE": ["MORTE", "OBITO"],
+        "DIAS_PERM": ["DIAS_PERM", "QT_DIARIAS"],
+        "ESPEC": ["ESPEC", "COD_ESPEC"],
+        "MOTIVO": ["COBRANCA", "MOT_SAIDA", "COBRA_SAI"],
+        "CLINICA": ["CLINICA"],
+        "PROC_REA": ["PROC_REA"],
+    },
+    "SP": {
+        "CNES": ["SP_CNES", "CNES"],
+        "ATOPROF": ["SP_ATOPROF"],
+        "QTD_ATO": ["SP_QTD_ATO"],
+        "VALATO": ["SP_VALATO"],
+        "NAIH": ["SP_NAIH"],
+        "IDADE": ["SP_IDADE", "IDADE", "NU_IDADE"],
+    },
+}
+
+# Colunas que podem faltar; sem qualquer outra o arquivo é de layout desconhecido
+# (CLINICA/PROC_REA só entram na auditoria, test_tmp.py)
+OPCIONAIS = {"RD": {"CLINICA", "PROC_REA"}, "SP": {"IDADE"}}
+
+# Dtype alvo de cada coluna canônica: (tipo, valor para o que não converter)
+DTYPES = {
+    "RD": {"CNES": ("int", 0), "MORTE": ("int", 0), "DIAS_PERM": ("int", 0), "ESPEC": ("str", None), "MOTIVO": ("int", 0),
+           "CLINICA": ("str", None), "PROC_REA": ("str", None)},
+    "SP": {"CNES": ("int", 0), "ATOPROF": ("str", None), "QTD_ATO": ("int", 0), "VALATO": ("float", 0.0), "IDADE": ("float", -1)},
+}
+
+
+# ===================== RESOLUÇÃO =====================
+
+class LayoutDesconhecido(Exception):
+    """Arquivo sem alguma coluna obrigatória do registro; o mês não deve virar zeros."""
+
+
+@lru_cache(maxsize=None)
+def _resolver(grupo, assinatura):
+    presentes = set(assinatura)
+    versao = next((v for v, m in LAYOUTS[grupo].items() if set(m.values()) <= presentes), None)
+    colunas = {canon: next((c for c in nomes if c in presentes), None) for canon, nomes in SINONIMOS[grupo].items()}
+    if versao: colunas.update(LAYOUTS[grupo][versao])
+    return versao, colunas
+
+
+def resolver(grupo, colunas):
+    """Esquema do arquivo: {"versao", "colunas": {canônico: coluna física ou None}, "dtypes"}.
+
+    Levanta LayoutDesconhecido se faltar coluna obrigatória (só as de OPCIONAIS ficam None).
+    """
+    originais = {c.upper().strip(): c for c in colunas}
+    versao, canonicas = _resolver(grupo, tuple(sorted(originais)))
+    faltando = [k for k, v in canonicas.items() if v is None and k not in OPCIONAIS[grupo]]
+    if faltando: raise LayoutDesconhecido(f"layout {grupo} desconhecido: falta {', '.join(faltando)}")
+    return {"versao": versao,
+            "colunas": {k: originais[v] if v else None for k, v in canonicas.items()},
+            "dtypes": DTYPES[grupo]}
+
+
+# ===================== LEITURA =====================
+
+def arquivos_parquet(parquets):
+    """Arquivos .parquet a partir do retorno de `sih_db.download` (ParquetSet ou lista).
+
+    Usado tanto na leitura pandas quanto no backend SQL (consulta_sql.py).
+    """
+    if not isinstance(parquets, (list, tuple)):
+        parquets = [parquets]
+    arquivos = []
+    for p in parquets:
+        caminho = str(getattr(p, "path", p))
+        arquivos += sorted(glob.glob(os.path.join(caminho, "*.parquet"))) if os.path.isdir(caminho) else [caminho]
+    return arquivos
+
+
+def normalizar(df, grupo):
+    """Converte as colunas canônicas presentes em `df` para o dtype do registro."""
+    import pandas as pd
+
+    for canon, (tipo, padrao) in DTYPES[grupo].items():
+        if canon not in df: continue
+        if tipo == "str":
+            df[canon] = df[canon].astype(str).str.strip()
+        else:
+            df[canon] = pd.to_numeric(df[canon], errors='coerce').fillna(padrao).astype(tipo)
+    return df
+
+
+def ler(parquets, grupo, canonicas=None):
+    """Lê só as colunas do esquema (ou só `canonicas`), já com nomes canônicos e dtypes alvo."""
+    import pyarrow.parquet as pq
+
+    arquivos = arquivos_parquet(parquets)
+    esquema = resolver(grupo, pq.read_schema(arquivos[0]).names)
+    renomear = {fis: canon for canon, fis in esquema["colunas"].items() if fis and (canonicas is None or canon in canonicas)}
+    df = pq.ParquetDataset(arquivos).read(columns=list(renomear)).to_pandas()
+    return normalizar(df.rename(columns=renomear), grupo)
@@ -0,0 +1,401 @@
+"""Cálculo dos indicadores da Santa Casa, sem dependência do Streamlit.
+
+Usado pela página (streamlit_app.py) e pela API local (api_indicadores.py).
+"""
+
+import calendar
+
+import consulta_sql
+
+import esquemas
+
+
+# ===================== PARÂMETROS =====================
+
+CAPACIDADE_FIXA = {'geral': 89, 'uti_a': 17, 'uti_n': 9, 'uti_p': 1}
+
+
+MAPA_UTI_ESTRITO = {
+
+    '0802010083': 'A',
+
+    '0802010121': 'N',
+
+    '0802010156': 'P'
+
+}
+
+
+# 1. ESPEC
+
+CODIGOS_ESPEC = {
+
+    'MEDICA': ['03'],    
+
+    'CIRURGICA': ['01']  
+
+}
+
+
+# 2. MOTIVOS QUE ENTRAM NOS DIAS, MAS NÃO NA CONTAGEM DE SAÍDA
+
+MOTIVOS_NAO_CONTAR_SAIDA = [26, 21, 22]
+
+
+# ===================== AUXILIARES =====================
+
+def get_meses_quadrimestre(q):
+
+    if q == "Q1 (Jan-Abr)": return [1, 2, 3, 4]
+
+    if q == "Q2 (Mai-Ago)": return [5, 6, 7, 8]
+
+    if q == "Q3 (Set-Dez)": return [9, 10, 11, 12]
+
+    return []
+
+
+def get_days_in_month(year, month):
+
+    return calendar.monthrange(year, month)[1]
+
+
+# --- PONTUAÇÃO ---
+
+def pontuacao_mortalidade(taxa): return 7 if taxa <= 3 else (4 if taxa < 6 else (2 if taxa <= 8 else 0))
+
+def pontuacao_ocupacao(taxa): return 7 if taxa >= 80 else (4 if taxa >= 65 else (2 if taxa >= 55 else 0))
+
+def pontuacao_tmp_medica(dias): return 6 if 0 < dias < 8 else (4 if 8 <= dias < 11 else (2 if 11 <= dias < 14 else 0))
+
+def pontuacao_tmp_cirurgica(dias): return 6 if 0 < dias < 5 else (4 if 5 <= dias < 7 else (2 if 7 <= dias < 9 else 0))
+
+def pontuacao_uti(taxa): return 6 if taxa >= 85 else (4 if taxa >= 70 else (2 if taxa >= 60 else 0))
+
+def pontuacao_infeccao(densidade): return 6 if densidade <= 2.0 else (4 if densidade <= 3.0 else (2 if densidade <= 5.0 else 0))
+
+
+# ===================== AGREGAÇÕES (pandas) =====================
+
+def agregar_rd_pandas(parquets, cnes_filter):
+
+    d = {k: 0 for k in ["saidas_tot", "obitos_tot", "dias_geral", "dias_med", "saidas_med", "dias_cir", "saidas_cir"]}
+
+    # Colunas já com nome canônico e dtype do registro (esquemas.py)
+
+    df_rd = esquemas.ler(parquets, "RD", ["CNES", "MORTE", "DIAS_PERM", "ESPEC", "MOTIVO"])
+
+    df_rd = df_rd[df_rd["CNES"] == int(cnes_filter)].copy()
+
+   
+
+    if not df_rd.empty:
+
+        # DIAS_PERM (Bruto, para bater os 5076); todas obrigatórias no registro (esquemas.py)
+
+        c_morte, c_dias, c_espec, c_motivo = "MORTE", "DIAS_PERM", "ESPEC", "MOTIVO"
+
+
+        # Filtro Básico (NÃO removemos motivo 26 aqui ainda!)
+
+        df_rd = df_rd[df_rd[c_dias] >= 0].copy()
+
+
+        d["saidas_tot"] = len(df_rd)
+
+        d["obitos_tot"] = df_rd[df_rd[c_morte] == 1].shape[0]
+
+        d["dias_geral"] = df_rd[c_dias].sum()
+
+
+        # === LÓGICA MISTA AQUI ===
+
+        df_rd['ESPEC_STR'] = df_rd[c_espec].str.split('.').str[0].str.strip().str.zfill(2)
+
+       
+
+        # --- MÉDICA (03) ---
+
+        # 1. Numerador: Pega TODOS (incluindo Motivo 26) -> Para bater 5076
+
+        df_med_dias = df_rd[df_rd['ESPEC_STR'].isin(CODIGOS_ESPEC['MEDICA'])]
+
+        d["dias_med"] = df_med_dias[c_dias].sum()
+
+       
+
+        # 2. Denominador: Filtra Motivos RUINS -> Para bater 601
+
+        df_med_saidas = df_med_dias[~df_med_dias[c_motivo].isin(MOTIVOS_NAO_CONTAR_SAIDA)]
+
+        d["saidas_med"] = len(df_med_saidas)
+
+       
+
+        # --- CIRÚRGICA (01) ---
+
+        # 1. Numerador: Todos -> Para bater 2407
+
+        df_cir_dias = df_rd[df_rd['ESPEC_STR'].isin(CODIGOS_ESPEC['CIRURGICA'])]
+
+        d["dias_cir"] = df_cir_dias[c_dias].sum()
+
+       
+
+        # 2. Denominador: Filtra -> Para bater 573
+
+        df_cir_saidas = df_cir_dias[~df_cir_dias[c_motivo].isin(MOTIVOS_NAO_CONTAR_SAIDA)]
+
+        d["saidas_cir"] = len(df_cir_saidas)
+
+
+    return d
+
+
+def agregar_sp_pandas(parquets, cnes_filter):
+
+    d = {"dias_a": 0, "dias_n": 0, "dias_p": 0}
+
+    df_sp = esquemas.ler(parquets, "SP")
+
+    df_sp = df_sp[df_sp["CNES"] == int(cnes_filter)].copy()
+
+   
+
+    if not df_sp.empty:
+
+        c_ato, c_qtd, c_val, c_aih = "ATOPROF", "QTD_ATO", "VALATO", "NAIH"
+
+
+        df_sp[c_ato] = df_sp[c_ato].str.replace(r"[^0-9]", "", regex=True)
+
+       
+
+        df_sp['IDADE_R'] = df_sp["IDADE"] if "IDADE" in df_sp else -1
+
+
+        df_ok = df_sp[df_sp[c_val] > 0].copy()
+
+       
+
+        if not df_ok.empty:
+
+            mask_a = (df_ok[c_ato] == '0802010083') & ((df_ok['IDADE_R'] >= 14) | (df_ok['IDADE_R'] == -1))
+
+            mask_n = (df_ok[c_ato] == '0802010121') & ((df_ok['IDADE_R'] < 1) | (df_ok['IDADE_R'] == -1))
+
+            mask_p = (df_ok[c_ato] == '0802010156')
+
+
+            d["dias_a"] = df_ok[mask_a].groupby([c_aih, c_ato])[c_qtd].sum().sum()
+
+            d["dias_n"] = df_ok[mask_n].groupby([c_aih, c_ato])[c_qtd].sum().sum()
+
+            d["dias_p"] = df_ok[mask_p].groupby([c_aih, c_ato])[c_qtd].sum().sum()
+
+
+    return d
+
+
+# Backend colunar quando o DuckDB estiver instalado; se ele falhar, refaz no pandas
+
+def agregar_rd(parquets, cnes_filter, logs):
+
+    if consulta_sql.disponivel():
+
+        try:
+
+            return consulta_sql.agregar_rd(parquets, cnes_filter, CODIGOS_ESPEC, MOTIVOS_NAO_CONTAR_SAIDA)
+
+        except consulta_sql.ErroSQL as e:
+
+            logs.append(f"RD: DuckDB falhou, usando pandas ({e})")
+
+    return agregar_rd_pandas(parquets, cnes_filter)
+
+
+def agregar_sp(parquets, cnes_filter, logs):
+
+    if consulta_sql.disponivel():
+
+        try:
+
+            return consulta_sql.agregar_sp(parquets, cnes_filter)
+
+        except consulta_sql.ErroSQL as e:
+
+            logs.append(f"SP: DuckDB falhou, usando pandas ({e})")
+
+    return agregar_sp_pandas(parquets, cnes_filter)
+
+
+# ===================== PROCESSAMENTO =====================
+
+def processar_mes_unico(ano, month, uf, cnes_filter):
+
+    # Imports pesados só aqui, para não pesar no carregamento da página
+
+    from pysus.ftp.databases.sih import SIH
+
+    sih_db = SIH().load()
+
+    year = ano
+
+    dias_mes = get_days_in_month(year, month)
+
+    caps = {k: v * dias_mes for k, v in CAPACIDADE_FIXA.items()}
+
+   
+
+    d = {k: 0 for k in ["saidas_tot", "obitos_tot", "dias_geral", "dias_med", "saidas_med",
+
+                        "dias_cir", "saidas_cir", "dias_a", "dias_n", "dias_p"]}
+
+    d['logs'] = []
+
+    d["sem_dados"] = []  # blocos sem arquivo ou com falha: o resultado não é definitivo
+
+    d["mes"] = month
+
+   
+
+    # ------------------- 1. RD (Lógica Mista) -------------------
+
+    try:
+
+        files_rd = sih_db.get_files(group="RD", uf=uf, year=year, month=month)
+
+        if files_rd:
+
+            d.update(agregar_rd(sih_db.download(files_rd), cnes_filter, d['logs']))
+
+        else: d["sem_dados"].append("RD")
+
+    except Exception as e:
+
+        d["sem_dados"].append("RD"); d['logs'].append(f"RD: {e}")
+
+
+    # ------------------- 2. SP (UTIs) -------------------
+
+    try:
+
+        files_sp = sih_db.get_files(group="SP", uf=uf, year=year, month=month)
+
+        if files_sp:
+
+            d.update(agregar_sp(sih_db.download(files_sp), cnes_filter, d['logs']))
+
+        else: d["sem_dados"].append("SP")
+
+    except Exception as e:
+
+        d["sem_dados"].append("SP"); d['logs'].append(f"SP: {e}")
+
+
+    d.update({"cap_geral": caps['geral'], "cap_a": caps['uti_a'], "cap_n": caps['uti_n'], "cap_p": caps['uti_p']})
+
+    return d
+
+
+# ===================== INDICADORES =====================
+
+def calcular_indicadores(res, manual):
+
+    """`res`: saídas de processar_mes_unico; `manual`: (ano, mes, casos, cvc) do CCIH."""
+
+    import pandas as pd
+
+    df = pd.DataFrame(res)
+
+    df["periodo"] = df["mes"].apply(lambda x: f"{x:02d}")
+
+   
+
+    man = pd.DataFrame(manual, columns=["ano", "mes", "casos", "cvc"])
+
+    df = pd.merge(df, man, on="mes", how="left")
+
+   
+
+    # Indicadores Mensais
+
+    df["tx_mort_m"] = (df["obitos_tot"]/df["saidas_tot"]*100).fillna(0)
+
+    df["tx_ocup_m"] = (df["dias_geral"]/df["cap_geral"]*100).clip(upper=100).fillna(0)
+
+    df["tmp_med_m"] = (df["dias_med"]/df["saidas_med"]).fillna(0)
+
+    df["tmp_cir_m"] = (df["dias_cir"]/df["saidas_cir"]).fillna(0)
+
+    df["tx_a_m"] = (df["dias_a"]/df["cap_a"]*100).fillna(0)
+
+    df["tx_n_m"] = (df["dias_n"]/df["cap_n"]*100).fillna(0)
+
+    df["tx_p_m"] = (df["dias_p"]/df["cap_p"]*100).fillna(0)
+
+    df["dens_inf_m"] = (df["casos"]/df["cvc"]*1000).fillna(0)
+
+
+    # Totais
+
+    t = {}
+
+    t['s_obitos'] = df['obitos_tot'].sum(); t['s_saidas'] = df['saidas_tot'].sum()
+
+    t['s_dias_g'] = df['dias_geral'].sum(); t['s_cap_g'] = df['cap_geral'].sum()
+
+    t['s_dias_m'] = df['dias_med'].sum(); t['s_sai_m'] = df['saidas_med'].sum()
+
+    t['s_dias_c'] = df['dias_cir'].sum(); t['s_sai_c'] = df['saidas_cir'].sum()
+
+    t['s_dias_a'] = df['dias_a'].sum(); t['s_cap_a'] = df['cap_a'].sum()
+
+    t['s_dias_n'] = df['dias_n'].sum(); t['s_cap_n'] = df['cap_n'].sum()
+
+    t['s_dias_p'] = df['dias_p'].sum(); t['s_cap_p'] = df['cap_p'].sum()
+
+    t['s_casos'] = df['casos'].sum(); t['s_cvc'] = df['cvc'].sum()
+
+
+    # Taxas
+
+    t['tx_mort'] = (t['s_obitos']/t['s_saidas']*100) if t['s_saidas'] else 0
+
+    t['tx_ocup'] = (t['s_dias_g']/t['s_cap_g']*100) if t['s_cap_g'] else 0
+
+    t['tx_med'] = (t['s_dias_m']/t['s_sai_m']) if t['s_sai_m'] else 0
+
+    t['tx_cir'] = (t['s_dias_c']/t['s_sai_c']) if t['s_sai_c'] else 0
+
+    t['tx_a'] = (t['s_dias_a']/t['s_cap_a']*100) if t['s_cap_a'] else 0
+
+    t['tx_n'] = (t['s_dias_n']/t['s_cap_n']*100) if t['s_cap_n'] else 0
+
+    t['tx_p'] = (t['s_dias_p']/t['s_cap_p']*100) if t['s_cap_p'] else 0
+
+    t['tx_inf'] = (t['s_casos']/t['s_cvc']*1000) if t['s_cvc'] else 0
+
+
+    # Pontos
+
+    t['p_mort'] = pontuacao_mortalidade(t['tx_mort'])
+
+    t['p_ocup'] = pontuacao_ocupacao(t['tx_ocup'])
+
+    t['p_med'] = pontuacao_tmp_medica(t['tx_med'])
+
+    t['p_cir'] = pontuacao_tmp_cirurgica(t['tx_cir'])
+
+    t['p_a'] = pontuacao_uti(t['tx_a'])
+
+    t['p_n'] = pontuacao_uti(t['tx_n'])
+
+    t['p_p'] = pontuacao_uti(t['tx_p'])
+
+    t['p_inf'] = pontuacao_infeccao(t['tx_inf'])
+
+    t['total_pts'] = t['p_mort'] + t['p_ocup'] + t['p_med'] + t['p_cir'] + t['p_a'] + t['p_n'] + t['p_p'] + t['p_inf']
+
+
+    return df, t
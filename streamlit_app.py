@@ -1,20 +1,10 @@
 import streamlit as st
 
-import pandas as pd
-
-import matplotlib.pyplot as plt
-
-from matplotlib.backends.backend_pdf import PdfPages
-
-import calendar
-
 import io
 
-import numpy as np
+# matplotlib, pandas e pysus só são importados no primeiro uso (ver bench_startup.py)
 
-from pysus.ftp.databases.sih import SIH
-
-from pysus.ftp.databases.cnes import CNES
+from indicadores import get_meses_quadrimestre, processar_mes_unico, calcular_indicadores
 
 
 # ===================== CONFIGURAÇÃO =====================
@@ -26,300 +16,9 @@ st.title("🏥 Indicadores - Santa Casa de Formiga")
 st.markdown("---")
 
 
-# ===================== PARÂMETROS =====================
-
-CAPACIDADE_FIXA = {'geral': 89, 'uti_a': 17, 'uti_n': 9, 'uti_p': 1}
-
-
-MAPA_UTI_ESTRITO = {
-
-    '0802010083': 'A',
-
-    '0802010121': 'N',
-
-    '0802010156': 'P'
-
-}
-
-
-# 1. ESPEC
-
-CODIGOS_ESPEC = {
-
-    'MEDICA': ['03'],    
-
-    'CIRURGICA': ['01']  
-
-}
-
-
-# 2. MOTIVOS QUE ENTRAM NOS DIAS, MAS NÃO NA CONTAGEM DE SAÍDA
-
-MOTIVOS_NAO_CONTAR_SAIDA = [26, 21, 22]
-
-
-# ===================== AUXILIARES =====================
-
-def get_meses_quadrimestre(q):
-
-    if q == "Q1 (Jan-Abr)": return [1, 2, 3, 4]
-
-    if q == "Q2 (Mai-Ago)": return [5, 6, 7, 8]
-
-    if q == "Q3 (Set-Dez)": return [9, 10, 11, 12]
-
-    return []
-
-
-def encontrar_coluna(df, candidatos):
-
-    cols_upper = [c.upper().strip() for c in df.columns]
-
-    for termo in candidatos:
-
-        for i, col in enumerate(cols_upper):
-
-            if termo == col: return df.columns[i]
-
-    for termo in candidatos:
-
-        for i, col in enumerate(cols_upper):
-
-            if termo in col: return df.columns[i]
-
-    return None
-
-
-def get_days_in_month(year, month):
-
-    return calendar.monthrange(year, month)[1]
-
-
-# --- PONTUAÇÃO ---
-
-def pontuacao_mortalidade(taxa): return 7 if taxa <= 3 else (4 if taxa < 6 else (2 if taxa <= 8 else 0))
-
-def pontuacao_ocupacao(taxa): return 7 if taxa >= 80 else (4 if taxa >= 65 else (2 if taxa >= 55 else 0))
-
-def pontuacao_tmp_medica(dias): return 6 if 0 < dias < 8 else (4 if 8 <= dias < 11 else (2 if 11 <= dias < 14 else 0))
-
-def pontuacao_tmp_cirurgica(dias): return 6 if 0 < dias < 5 else (4 if 5 <= dias < 7 else (2 if 7 <= dias < 9 else 0))
-
-def pontuacao_uti(taxa): return 6 if taxa >= 85 else (4 if taxa >= 70 else (2 if taxa >= 60 else 0))
-
-def pontuacao_infeccao(densidade): return 6 if densidade <= 2.0 else (4 if densidade <= 3.0 else (2 if densidade <= 5.0 else 0))
-
-
 # ===================== PROCESSAMENTO =====================
 
-@st.cache_data(show_spinner=False)
-
-def processar_mes_unico(ano, month, uf, cnes_filter):
-
-    sih_db = SIH().load()
-
-    year = ano
-
-    dias_mes = get_days_in_month(year, month)
-
-    caps = {k: v * dias_mes for k, v in CAPACIDADE_FIXA.items()}
-
-   
-
-    d = {k: 0 for k in ["saidas_tot", "obitos_tot", "dias_geral", "dias_med", "saidas_med",
-
-                        "dias_cir", "saidas_cir", "dias_a", "dias_n", "dias_p"]}
-
-    d['logs'] = []
-
-    d["mes"] = month
-
-   
-
-    # ------------------- 1. RD (Lógica Mista) -------------------
-
-    try:
-
-        files_rd = sih_db.get_files(group="RD", uf=uf, year=year, month=month)
-
-        if files_rd:
-
-            df_rd = sih_db.download(files_rd).to_dataframe()
-
-            df_rd.columns = [c.upper().strip() for c in df_rd.columns]
-
-           
-
-            cnes_c = encontrar_coluna(df_rd, ["CNES", "CNES_EXEC"])
-
-            if cnes_c:
-
-                df_rd['CNES_INT'] = pd.to_numeric(df_rd[cnes_c], errors='coerce').fillna(0).astype(int)
-
-                df_rd = df_rd[df_rd['CNES_INT'] == int(cnes_filter)].copy()
-
-               
-
-                if not df_rd.empty:
-
-                    c_morte = encontrar_coluna(df_rd, ["MORTE", "OBITO"])
-
-                   
-
-                    # DIAS_PERM (Bruto, para bater os 5076)
-
-                    c_dias = encontrar_coluna(df_rd, ["DIAS_PERM", "QT_DIARIAS"])
-
-                   
-
-                    c_espec = encontrar_coluna(df_rd, ["ESPEC", "COD_ESPEC"])
-
-                    c_motivo = encontrar_coluna(df_rd, ["COBRANCA", "MOT_SAIDA", "COBRA_SAI"])
-
-
-                    if c_morte: df_rd[c_morte] = pd.to_numeric(df_rd[c_morte], errors='coerce').fillna(0).astype(int)
-
-                    if c_dias: df_rd[c_dias] = pd.to_numeric(df_rd[c_dias], errors='coerce').fillna(0).astype(int)
-
-
-                    # Filtro Básico (NÃO removemos motivo 26 aqui ainda!)
-
-                    df_rd = df_rd[df_rd[c_dias] >= 0].copy()
-
-
-                    if c_morte and c_dias:
-
-                        d["saidas_tot"] = len(df_rd)
-
-                        d["obitos_tot"] = df_rd[df_rd[c_morte] == 1].shape[0]
-
-                        d["dias_geral"] = df_rd[c_dias].sum()
-
-
-                    # === LÓGICA MISTA AQUI ===
-
-                    if c_espec and c_motivo:
-
-                        df_rd['ESPEC_STR'] = df_rd[c_espec].astype(str).str.split('.').str[0].str.strip().str.zfill(2)
-
-                        df_rd['MOTIVO_INT'] = pd.to_numeric(df_rd[c_motivo], errors='coerce').fillna(0).astype(int)
-
-                       
-
-                        # --- MÉDICA (03) ---
-
-                        # 1. Numerador: Pega TODOS (incluindo Motivo 26) -> Para bater 5076
-
-                        df_med_dias = df_rd[df_rd['ESPEC_STR'].isin(CODIGOS_ESPEC['MEDICA'])]
-
-                        d["dias_med"] = df_med_dias[c_dias].sum()
-
-                       
-
-                        # 2. Denominador: Filtra Motivos RUINS -> Para bater 601
-
-                        df_med_saidas = df_med_dias[~df_med_dias['MOTIVO_INT'].isin(MOTIVOS_NAO_CONTAR_SAIDA)]
-
-                        d["saidas_med"] = len(df_med_saidas)
-
-                       
-
-                        # --- CIRÚRGICA (01) ---
-
-                        # 1. Numerador: Todos -> Para bater 2407
-
-                        df_cir_dias = df_rd[df_rd['ESPEC_STR'].isin(CODIGOS_ESPEC['CIRURGICA'])]
-
-                        d["dias_cir"] = df_cir_dias[c_dias].sum()
-
-                       
-
-                        # 2. Denominador: Filtra -> Para bater 573
-
-                        df_cir_saidas = df_cir_dias[~df_cir_dias['MOTIVO_INT'].isin(MOTIVOS_NAO_CONTAR_SAIDA)]
-
-                        d["saidas_cir"] = len(df_cir_saidas)
-
-
-    except Exception: pass
-
-
-    # ------------------- 2. SP (UTIs) -------------------
-
-    try:
-
-        files_sp = sih_db.get_files(group="SP", uf=uf, year=year, month=month)
-
-        if files_sp:
-
-            df_sp = sih_db.download(files_sp).to_dataframe()
-
-            df_sp.columns = [c.upper().strip() for c in df_sp.columns]
-
-           
-
-            cnes_s = encontrar_coluna(df_sp, ["CNES", "SP_CNES"])
-
-            if cnes_s:
-
-                df_sp['CNES_INT'] = pd.to_numeric(df_sp[cnes_s], errors='coerce').fillna(0).astype(int)
-
-                df_sp = df_sp[df_sp['CNES_INT'] == int(cnes_filter)].copy()
-
-               
-
-                if not df_sp.empty:
-
-                    c_ato = next((c for c in df_sp.columns if "ATOPROF" in c), "SP_ATOPROF")
-
-                    c_qtd = next((c for c in df_sp.columns if "QT_" in c), "SP_QTD_ATO")
-
-                    c_val = next((c for c in df_sp.columns if "VAL" in c), "SP_VALATO")
-
-                    c_aih = next((c for c in df_sp.columns if "NAIH" in c), "SP_NAIH")
-
-                    c_idade = next((c for c in df_sp.columns if "IDADE" in c or "NU_IDADE" in c), None)
-
-
-                    df_sp[c_ato] = df_sp[c_ato].astype(str).str.strip().str.replace(r"[^0-9]", "", regex=True)
-
-                    df_sp[c_qtd] = pd.to_numeric(df_sp[c_qtd], errors='coerce').fillna(0).astype(int)
-
-                    df_sp[c_val] = pd.to_numeric(df_sp[c_val], errors='coerce').fillna(0.0)
-
-                   
-
-                    if c_idade: df_sp['IDADE_R'] = pd.to_numeric(df_sp[c_idade], errors='coerce').fillna(-1)
-
-                    else: df_sp['IDADE_R'] = -1
-
-
-                    df_ok = df_sp[df_sp[c_val] > 0].copy()
-
-                   
-
-                    if not df_ok.empty:
-
-                        mask_a = (df_ok[c_ato] == '0802010083') & ((df_ok['IDADE_R'] >= 14) | (df_ok['IDADE_R'] == -1))
-
-                        mask_n = (df_ok[c_ato] == '0802010121') & ((df_ok['IDADE_R'] < 1) | (df_ok['IDADE_R'] == -1))
-
-                        mask_p = (df_ok[c_ato] == '0802010156')
-
-
-                        d["dias_a"] = df_ok[mask_a].groupby([c_aih, c_ato])[c_qtd].sum().sum()
-
-                        d["dias_n"] = df_ok[mask_n].groupby([c_aih, c_ato])[c_qtd].sum().sum()
-
-                        d["dias_p"] = df_ok[mask_p].groupby([c_aih, c_ato])[c_qtd].sum().sum()
-
-
-    except Exception: pass
-
-
-    d.update({"cap_geral": caps['geral'], "cap_a": caps['uti_a'], "cap_n": caps['uti_n'], "cap_p": caps['uti_p']})
-
-    return d
+processar_mes_unico = st.cache_data(show_spinner=False)(processar_mes_unico)
 
 
 # ===================== PLOTAGEM =====================
@@ -345,6 +44,10 @@ def plot_indicador(ax, df, col_y, media, title, color_ok):
 
 def gerar_pdf_buffer(df, cnes, t):
 
+    import matplotlib.pyplot as plt
+
+    from matplotlib.backends.backend_pdf import PdfPages
+
     buffer = io.BytesIO()
 
     with PdfPages(buffer) as pdf:
@@ -479,100 +182,17 @@ if st.button("Processar Dados", type="primary"):
 
    
 
-    status.text("Calculando indicadores..."); bar.progress(100)
+    faltando = [f"{r['mes']:02d} ({', '.join(r['sem_dados'])})" for r in res if r['sem_dados']]
 
-   
-
-    df = pd.DataFrame(res)
-
-    df["periodo"] = df["mes"].apply(lambda x: f"{x:02d}")
+    if faltando: st.warning(f"Sem dados do DATASUS (ou falha no download) em: {'; '.join(faltando)}. Esses meses entram zerados; use 'Limpar Cache' para tentar de novo.")
 
    
 
-    man = pd.DataFrame(manual, columns=["ano", "mes", "casos", "cvc"])
-
-    df = pd.merge(df, man, on="mes", how="left")
+    status.text("Calculando indicadores..."); bar.progress(100)
 
    
 
-    # Indicadores Mensais
-
-    df["tx_mort_m"] = (df["obitos_tot"]/df["saidas_tot"]*100).fillna(0)
-
-    df["tx_ocup_m"] = (df["dias_geral"]/df["cap_geral"]*100).clip(upper=100).fillna(0)
-
-    df["tmp_med_m"] = (df["dias_med"]/df["saidas_med"]).fillna(0)
-
-    df["tmp_cir_m"] = (df["dias_cir"]/df["saidas_cir"]).fillna(0)
-
-    df["tx_a_m"] = (df["dias_a"]/df["cap_a"]*100).fillna(0)
-
-    df["tx_n_m"] = (df["dias_n"]/df["cap_n"]*100).fillna(0)
-
-    df["tx_p_m"] = (df["dias_p"]/df["cap_p"]*100).fillna(0)
-
-    df["dens_inf_m"] = (df["casos"]/df["cvc"]*1000).fillna(0)
-
-
-    # Totais
-
-    t = {}
-
-    t['s_obitos'] = df['obitos_tot'].sum(); t['s_saidas'] = df['saidas_tot'].sum()
-
-    t['s_dias_g'] = df['dias_geral'].sum(); t['s_cap_g'] = df['cap_geral'].sum()
-
-    t['s_dias_m'] = df['dias_med'].sum(); t['s_sai_m'] = df['saidas_med'].sum()
-
-    t['s_dias_c'] = df['dias_cir'].sum(); t['s_sai_c'] = df['saidas_cir'].sum()
-
-    t['s_dias_a'] = df['dias_a'].sum(); t['s_cap_a'] = df['cap_a'].sum()
-
-    t['s_dias_n'] = df['dias_n'].sum(); t['s_cap_n'] = df['cap_n'].sum()
-
-    t['s_dias_p'] = df['dias_p'].sum(); t['s_cap_p'] = df['cap_p'].sum()
-
-    t['s_casos'] = df['casos'].sum(); t['s_cvc'] = df['cvc'].sum()
-
-
-    # Taxas
-
-    t['tx_mort'] = (t['s_obitos']/t['s_saidas']*100) if t['s_saidas'] else 0
-
-    t['tx_ocup'] = (t['s_dias_g']/t['s_cap_g']*100) if t['s_cap_g'] else 0
-
-    t['tx_med'] = (t['s_dias_m']/t['s_sai_m']) if t['s_sai_m'] else 0
-
-    t['tx_cir'] = (t['s_dias_c']/t['s_sai_c']) if t['s_sai_c'] else 0
-
-    t['tx_a'] = (t['s_dias_a']/t['s_cap_a']*100) if t['s_cap_a'] else 0
-
-    t['tx_n'] = (t['s_dias_n']/t['s_cap_n']*100) if t['s_cap_n'] else 0
-
-    t['tx_p'] = (t['s_dias_p']/t['s_cap_p']*100) if t['s_cap_p'] else 0
-
-    t['tx_inf'] = (t['s_casos']/t['s_cvc']*1000) if t['s_cvc'] else 0
-
-
-    # Pontos
-
-    t['p_mort'] = pontuacao_mortalidade(t['tx_mort'])
-
-    t['p_ocup'] = pontuacao_ocupacao(t['tx_ocup'])
-
-    t['p_med'] = pontuacao_tmp_medica(t['tx_med'])
-
-    t['p_cir'] = pontuacao_tmp_cirurgica(t['tx_cir'])
-
-    t['p_a'] = pontuacao_uti(t['tx_a'])
-
-    t['p_n'] = pontuacao_uti(t['tx_n'])
-
-    t['p_p'] = pontuacao_uti(t['tx_p'])
-
-    t['p_inf'] = pontuacao_infeccao(t['tx_inf'])
-
-    t['total_pts'] = t['p_mort'] + t['p_ocup'] + t['p_med'] + t['p_cir'] + t['p_a'] + t['p_n'] + t['p_p'] + t['p_inf']
+    df, t = calcular_indicadores(res, manual)
 
 
     status.success("Concluído!")
@@ -604,6 +224,8 @@ if st.button("Processar Dados", type="primary"):
 
     with tab1:
 
+        import matplotlib.pyplot as plt
+
         c1, c2 = st.columns(2)
 
         fig, ax = plt.subplots(figsize=(6,4)); plot_indicador(ax, df, "tx_mort_m", t['tx_mort'], "Mortalidade", "#2a9d8f"); c1.pyplot(fig)
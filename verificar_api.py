@@ -0,0 +1,134 @@
+"""Confere o cache HTTP da API (api_indicadores.py) sem baixar nada do DATASUS.
+
+Troca `processar_mes_unico` por um falso que conta as chamadas, sobe o
+servidor numa porta livre com o cache num diretório temporário e confere:
+ETag/If-None-Match e If-Modified-Since dão 304, mês com sem_dados não vira
+arquivo final (fica no .parcial.json com max-age e não é recalculado antes do
+TTL) e o ETag do quadrimestre muda quando um dos meses é recalculado.
+
+Uso:
+    python verificar_api.py
+
+Sai com código 1 se alguma verificação falhar.
+"""
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer
+
+import api_indicadores
+
+
+CNES, UF, ANO = "2142376", "MG", 2025
+
+chamadas = Counter()   # mes -> vezes que o "pipeline" rodou
+sem_dados = {}         # mes -> blocos faltando na próxima chamada
+saidas = {}            # mes -> saidas_tot da próxima chamada
+
+
+def processar_falso(ano, mes, uf, cnes):
+    chamadas[mes] += 1
+    d = {k: 1 for k in ["obitos_tot", "dias_geral", "dias_med", "saidas_med",
+                        "dias_cir", "saidas_cir", "dias_a", "dias_n", "dias_p"]}
+    d.update({"saidas_tot": saidas.get(mes, 10), "logs": [], "sem_dados": list(sem_dados.get(mes, [])), "mes": mes,
+              "cap_geral": 100, "cap_a": 10, "cap_n": 10, "cap_p": 10})
+    return d
+
+
+class HandlerQuieto(api_indicadores.Handler):
+    def log_message(self, *args):
+        pass
+
+
+def get(porta, caminho, **headers):
+    con = http.client.HTTPConnection("127.0.0.1", porta, timeout=30)
+    con.request("GET", caminho, headers={k.replace("_", "-"): v for k, v in headers.items()})
+    r = con.getresponse()
+    corpo = r.read()
+    con.close()
+    return r.status, r.headers, corpo
+
+
+def arquivo_mes(mes, parcial=False):
+    caminho = api_indicadores._caminho("mes", {"cnes": CNES, "uf": UF, "ano": ANO, "mes": mes})
+    return caminho[:-len(".json")] + ".parcial.json" if parcial else caminho
+
+
+def main():
+    falhas = []
+
+    def conferir(nome, ok, detalhe=""):
+        print(f"{nome}: {'OK' if ok else 'FALHOU'} {detalhe}".rstrip())
+        if not ok: falhas.append(nome)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        api_indicadores.DIR_CACHE = tmp
+        api_indicadores.processar_mes_unico = processar_falso
+        servidor = ThreadingHTTPServer(("127.0.0.1", 0), HandlerQuieto)
+        porta = servidor.server_address[1]
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        try:
+            mes = f"/mes?cnes={CNES}&uf={UF}&ano={ANO}&mes=5"
+
+            # 1. ETag / If-None-Match
+            status, h, _ = get(porta, mes)
+            conferir("mes_200", status == 200 and h["Cache-Control"] == "no-cache", f"{status} {h['Cache-Control']}")
+            status, _, corpo = get(porta, mes, If_None_Match=h["ETag"])
+            conferir("if_none_match_304", status == 304 and not corpo, str(status))
+
+            # 2. If-Modified-Since
+            status, _, _ = get(porta, mes, If_Modified_Since=h["Last-Modified"])
+            conferir("if_modified_since_304", status == 304, str(status))
+            conferir("mes_calculado_uma_vez", chamadas[5] == 1, f"chamadas={chamadas[5]}")
+
+            # 3. Mês com sem_dados: só no .parcial.json, com max-age, sem recalcular antes do TTL
+            sem_dados[6] = ["SP"]
+            mes6 = f"/mes?cnes={CNES}&uf={UF}&ano={ANO}&mes=6"
+            status, h, corpo = get(porta, mes6)
+            conferir("parcial_sem_dados", status == 200 and json.loads(corpo)["sem_dados"] == ["SP"], str(status))
+            conferir("parcial_nao_final", not os.path.exists(arquivo_mes(6)) and os.path.exists(arquivo_mes(6, True)))
+            conferir("parcial_max_age", h["Cache-Control"].startswith("max-age=")
+                     and 0 < int(h["Cache-Control"].split("=")[1]) <= api_indicadores.TTL_PARCIAL, h["Cache-Control"])
+            get(porta, mes6)
+            conferir("parcial_dentro_do_ttl", chamadas[6] == 1, f"chamadas={chamadas[6]}")
+
+            # TTL vencido e dados completos: recalcula e grava o final
+            del sem_dados[6]
+            vencido = os.path.getmtime(arquivo_mes(6, True)) - api_indicadores.TTL_PARCIAL - 1
+            os.utime(arquivo_mes(6, True), (vencido, vencido))
+            status, h, corpo = get(porta, mes6)
+            conferir("parcial_recalculado", chamadas[6] == 2 and json.loads(corpo)["sem_dados"] == [], f"chamadas={chamadas[6]}")
+            conferir("final_gravado", os.path.exists(arquivo_mes(6)) and not os.path.exists(arquivo_mes(6, True))
+                     and h["Cache-Control"] == "no-cache", h["Cache-Control"])
+
+            # 4. Quadrimestre acompanha mês recalculado
+            quad = f"/quadrimestre?cnes={CNES}&uf={UF}&ano={ANO}&q=Q2"
+            status, h, _ = get(porta, quad)
+            etag = h["ETag"]
+            status, _, _ = get(porta, quad, If_None_Match=etag)
+            conferir("quadrimestre_304", status == 304, str(status))
+            os.remove(arquivo_mes(7))
+            saidas[7] = 20
+            status, h, corpo = get(porta, quad, If_None_Match=etag)
+            conferir("quadrimestre_etag_muda", status == 200 and h["ETag"] != etag
+                     and json.loads(corpo)["totais"]["s_saidas"] == 50, f"{status} {h['ETag']} {etag}")
+
+            # Quadrimestre com mês parcial herda o max-age dele
+            os.remove(arquivo_mes(8))
+            sem_dados[8] = ["RD"]
+            status, h, corpo = get(porta, quad)
+            conferir("quadrimestre_parcial", h["Cache-Control"].startswith("max-age=")
+                     and json.loads(corpo)["sem_dados"] == {"08": ["RD"]}, h["Cache-Control"])
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Confere se o backend DuckDB (consulta_sql.py) dá o mesmo `d` que o caminho pandas.
+
+Gera arquivos RD/SP sintéticos com as sujeiras que aparecem no DATASUS (espaços,
+float em coluna inteira, NAIH nulo, ESPEC de um dígito, motivos 21/22/26, colunas
+parecidas como SP_QT_PROC, "nan" em coluna numérica, CNES com espaço) e roda as
+duas agregações sobre cada um. Layouts sem coluna obrigatória (INCOMPLETOS)
+têm que falhar nos dois com esquemas.LayoutDesconhecido, em vez de dar zeros.
+
+Uso:
+    python verificar_paridade.py
+
+Sai com código 1 se algum campo divergir.
+"""
+import os
+import sys
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import consulta_sql
+import esquemas
+from indicadores import CODIGOS_ESPEC, MOTIVOS_NAO_CONTAR_SAIDA, agregar_rd_pandas, agregar_sp_pandas
+
+
+CNES = 2142376
+
+CASOS = {
+    # Layout conhecido (RD_2008), tudo texto como o pysus grava
+    "rd_2008": ("RD", {
+        "CNES":      ["2142376", "2142376", "2142376", "2142376", "2142376", "2142376", "2142376", "2142376", "1234567"],
+        "MORTE":     ["0", " 1", "1", "NaN", None, "0", "0", "1", "1"],
+        "DIAS_PERM": [" 5 ", "3.0", "7", "abc", "-1", "12", "2.9", "nan", "100"],
+        "ESPEC":     ["3", "03", " 01 ", "1.0", "3.0", "1", None, "03", "3"],
+        "COBRANCA":  ["26", "21", "22", "12", " 26", "21.0", "11", "31", "12"],
+    }),
+    # Layout conhecido com CNES "sujo" em texto (espaços, sufixo .0)
+    "rd_cnes_texto": ("RD", {
+        "CNES":      [" 2142376", "2142376 ", "2142376.0", "02142376", "1234567"],
+        "MORTE":     ["0", "1", "0", "0", "1"],
+        "DIAS_PERM": ["1", "2", "3", "4", "5"],
+        "ESPEC":     ["3", "1", "03", "01", "3"],
+        "COBRANCA":  ["12", "12", "26", "12", "12"],
+    }),
+    # Layout desconhecido: sinônimos, CNES numérico (float) e com espaços no resto
+    "rd_alternativo": ("RD", {
+        "CNES_EXEC":  [2142376.0, 2142376.0, 2142376.0, 2142376.0, 9999999.0],
+        "OBITO":      ["1", "0", "0", " 1", "1"],
+        "QT_DIARIAS": ["10", " 2", "3.5", "", "8"],
+        "COD_ESPEC":  ["3", "1", "03", "01", "3"],
+        "MOT_SAIDA":  ["22", "12", "26", "21", "12"],
+    }),
+    # SP sem idade, com colunas que a busca por substring confundia
+    "sp_2008": ("SP", {
+        "SP_CNES":    ["2142376", "2142376", "2142376", "2142376", "2142376", "2142376", "1234567"],
+        "SP_NAIH":    ["1", "1", "2", None, "3", "4", "5"],
+        "SP_ATOPROF": [" 0802010083", "08.02.01.008-3", "0802010121", "0802010083", "0802010156", "0802010156", "0802010083"],
+        "SP_QT_PROC": ["99", "99", "99", "99", "99", "99", "99"],
+        "SP_QTD_ATO": ["2", "1.0", " 3 ", "5", "4", "x", "9"],
+        "IN_TP_VAL":  ["1", "1", "1", "1", "1", "1", "1"],
+        "SP_VALATO":  ["10.5", "3", "1", "8", "0", "2", "7"],
+    }),
+    # SP com idade (adulto >= 14, neo < 1, sem idade conta nos dois)
+    "sp_idade": ("SP", {
+        "SP_CNES":    ["2142376"] * 6,
+        "SP_NAIH":    ["1", "2", "3", "4", "5", "6"],
+        "SP_ATOPROF": ["0802010083", "0802010083", "0802010121", "0802010121", "0802010083", "0802010121"],
+        "SP_QTD_ATO": ["1", "2", "3", "4", "5", "6"],
+        "SP_VALATO":  ["1", "1", "1", "1", "1", "1"],
+        "IDADE":      ["20", " 10", "0", "2", None, "abc"],
+    }),
+    # "nan" no valor e na idade: o pandas trata como vazio (0 e -1)
+    "sp_nan": ("SP", {
+        "SP_CNES":    ["2142376"] * 5,
+        "SP_NAIH":    ["1", "2", "3", "4", "5"],
+        "SP_ATOPROF": ["0802010083", "0802010121", "0802010083", "0802010121", "0802010083"],
+        "SP_QTD_ATO": ["3", "4", "5", "nan", "2"],
+        "SP_VALATO":  ["1", "1", "NaN", "1", "1"],
+        "SP_IDADE":   ["nan", "nan", "20", "NaN", "20"],
+    }),
+}
+
+# Sem coluna obrigatória: os dois backends têm que recusar o arquivo
+INCOMPLETOS = {
+    "rd_sem_dias": ("RD", {"CNES": ["2142376"], "MORTE": ["0"], "ESPEC": ["03"], "COBRANCA": ["12"]}),
+    "rd_sem_cnes": ("RD", {"CNES_HOSP": ["2142376"], "MORTE": ["0"], "DIAS_PERM": ["1"], "ESPEC": ["03"], "COBRANCA": ["12"]}),
+    "sp_sem_valato": ("SP", {"SP_CNES": ["2142376"], "SP_NAIH": ["1"], "SP_ATOPROF": ["0802010083"], "SP_QTD_ATO": ["1"]}),
+}
+
+
+def falha(funcao, *args):
+    try:
+        funcao(*args)
+    except esquemas.LayoutDesconhecido as e:
+        return str(e)
+    return None
+
+
+def gravar(diretorio, nome, colunas):
+    caminho = os.path.join(diretorio, f"{nome}.parquet")
+    pq.write_table(pa.table(colunas), caminho)
+    return caminho
+
+
+def main():
+    if not consulta_sql.disponivel():
+        print("duckdb não instalado; nada a comparar")
+        return 1
+
+    divergencias = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for nome, (grupo, colunas) in CASOS.items():
+            caminho = gravar(tmp, nome, colunas)
+            if grupo == "RD":
+                esperado = agregar_rd_pandas(caminho, CNES)
+                obtido = consulta_sql.agregar_rd(caminho, CNES, CODIGOS_ESPEC, MOTIVOS_NAO_CONTAR_SAIDA)
+            else:
+                esperado = agregar_sp_pandas(caminho, CNES)
+                obtido = consulta_sql.agregar_sp(caminho, CNES)
+
+            diff = {k: (esperado[k], obtido.get(k)) for k in esperado if obtido.get(k) != esperado[k]}
+            print(f"{nome}: {'OK' if not diff else 'DIVERGE'} {dict((k, int(v)) for k, v in obtido.items())}")
+            for k, (p, s) in diff.items():
+                print(f"  {k}: pandas={p} duckdb={s}")
+            divergencias += len(diff)
+
+        for nome, (grupo, colunas) in INCOMPLETOS.items():
+            caminho = gravar(tmp, nome, colunas)
+            if grupo == "RD":
+                erros = [falha(agregar_rd_pandas, caminho, CNES),
+                         falha(consulta_sql.agregar_rd, caminho, CNES, CODIGOS_ESPEC, MOTIVOS_NAO_CONTAR_SAIDA)]
+            else:
+                erros = [falha(agregar_sp_pandas, caminho, CNES), falha(consulta_sql.agregar_sp, caminho, CNES)]
+            ok = erros[0] is not None and erros[0] == erros[1]
+            print(f"{nome}: {'OK' if ok else 'DIVERGE'} pandas={erros[0]!r} duckdb={erros[1]!r}")
+            divergencias += not ok
+
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())